@@ -4,12 +4,26 @@ import re
 import logging
 from server_state import ServerState
 from server_state import now
+from resource_sampler import ResourceSampler
 from telert import send
 from welcome_message_builder import WelcomeBackMessage
 
 logger = logging.getLogger(__name__)
 
 
+def get_container():
+    """Get the minecraft docker container
+
+    :return: the docker container running the server
+    """
+
+    client = docker.from_env()
+    container = client.containers.get('minecraft-mc-1')
+    # container = client.containers.get('minecraft-dev-mc-1') # dev container
+
+    return container
+
+
 def send_command(command:str) -> str:
     """Execute a minecraft command via docker container
 
@@ -17,9 +31,7 @@ def send_command(command:str) -> str:
     :return: the command results from the server as a string
     """
 
-    client = docker.from_env()
-    container = client.containers.get('minecraft-mc-1')
-    # container = client.containers.get('minecraft-dev-mc-1') # dev container
+    container = get_container()
 
     full_command = 'rcon-cli ' + command 
     exec_log = container.exec_run(full_command, stdout=True, stderr=True).output.decode()
@@ -208,6 +220,31 @@ def send_welcome_message(current_state:ServerState, target_player:str) -> None:
     send_command(message)
 
 
+def sample_container_resources(current_state:ServerState, filepath:str="resource_stats.json") -> ResourceSampler:
+    """Sample CPU, memory, block I/O and network I/O of the server container from the docker stats stream.
+
+    Samples are tagged with the current player count so the rollups show resource cost per online player.
+    The new samples are merged into the rollups saved in filepath.
+
+    :param current_state: current state of the server
+    :param filepath: rollup file to read from and save to, defaults to "resource_stats.json"
+    :return: a ResourceSampler with the new samples merged into the saved rollups
+    """
+
+    sampler = ResourceSampler(filepath)
+    player_count = len(current_state.get_online_players())
+
+    stream = get_container().stats(stream=True, decode=True)
+    try:
+        sampler.consume_stream(stream, player_count)
+    finally:
+        stream.close()
+
+    sampler.save_to_file(filepath)
+
+    return sampler
+
+
 def send_telegram_updates(previous_state:ServerState, current_state:ServerState) -> None:
     """This function sends a Telegram update whenever there is a change in server population
 
@@ -278,6 +315,11 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"Something went wrong when trying to send welcome message: {e}")
 
+    try:
+        sample_container_resources(current_state)
+    except Exception as e:
+        logger.error(f"Something went wrong when sampling container resources: {e}")
+
     # 3. Save state to file
     current_state.save_to_file('server_state.json')
 
@@ -0,0 +1,366 @@
+import os
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+# order of the fields stored for each rollup bucket. Sums (rather than averages) are stored so that
+# samples from later runs of the monitor can be merged into a bucket that is already on disk
+ROLLUP_FIELDS = [
+    "count",
+    "cpu_percent_sum",
+    "cpu_percent_max",
+    "memory_bytes_sum",
+    "memory_bytes_max",
+    "memory_limit_bytes",
+    "block_read_rate_sum",
+    "block_write_rate_sum",
+    "network_rx_rate_sum",
+    "network_tx_rate_sum",
+    "player_count_sum",
+]
+
+
+def parse_docker_timestamp(timestamp:str) -> float:
+    """Convert a docker stats timestamp to a unix timestamp.
+
+    Docker reports nanoseconds (e.g. "2025-11-02T10:15:01.123456789Z") which datetime can't parse, so the
+    fraction is truncated to microseconds first.
+
+    :param timestamp: the "read" field of a docker stats sample
+    :return: unix timestamp as a float
+    """
+    timestamp = timestamp.replace("Z", "+00:00")
+    if "." in timestamp:
+        seconds, rest = timestamp.split(".", 1)
+        offset_start = max(rest.find("+"), rest.find("-"))
+        fraction, offset = (rest[:offset_start], rest[offset_start:]) if offset_start >= 0 else (rest, "")
+        timestamp = f"{seconds}.{fraction[:6].ljust(6, '0')}{offset}"
+
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def is_running_sample(stats:dict) -> bool:
+    """Check a docker stats sample came from a running container.
+
+    While the container is stopped or restarting, docker sends samples with a zero "read" time and no usage.
+
+    :param stats: a single decoded docker stats sample
+    :return: True if the sample has a real timestamp and CPU and memory usage
+    """
+    read = stats.get("read", "")
+    if read == "" or read.startswith("0001-01-01"):
+        return False
+
+    cpu_usage = (stats.get("cpu_stats") or {}).get("cpu_usage", {}).get("total_usage", 0)
+    memory_usage = (stats.get("memory_stats") or {}).get("usage", 0)
+
+    return cpu_usage > 0 and memory_usage > 0
+
+
+def calculate_cpu_percent(stats:dict):
+    """Calculate CPU usage the same way `docker stats` does, using the previous reading included in each sample.
+
+    :param stats: a single decoded docker stats sample
+    :return: CPU usage as a percentage of one core (e.g. 250.0 = two and a half cores busy), None if it can't be calculated
+    """
+    cpu_stats = stats.get("cpu_stats", {})
+    precpu_stats = stats.get("precpu_stats", {})
+
+    cpu_delta = cpu_stats.get("cpu_usage", {}).get("total_usage", 0) - precpu_stats.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu_stats.get("system_cpu_usage", 0)
+
+    # the first sample of a stream has no previous reading
+    if "system_cpu_usage" not in precpu_stats or system_delta <= 0:
+        return None
+    if cpu_delta <= 0:
+        return 0.0
+
+    online_cpus = cpu_stats.get("online_cpus") or len(cpu_stats.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+
+    return cpu_delta / system_delta * online_cpus * 100.0
+
+
+def calculate_memory_usage(stats:dict) -> tuple:
+    """Calculate resident memory usage, excluding the page cache, the same way `docker stats` does.
+
+    :param stats: a single decoded docker stats sample
+    :return: a tuple (usage in bytes, limit in bytes)
+    """
+    memory_stats = stats.get("memory_stats", {})
+    details = memory_stats.get("stats", {})
+
+    # cgroup v2 reports inactive_file, cgroup v1 reports total_inactive_file
+    cache = details.get("inactive_file", details.get("total_inactive_file", 0))
+    usage = max(0, memory_stats.get("usage", 0) - cache)
+
+    return (usage, memory_stats.get("limit", 0))
+
+
+def calculate_block_io(stats:dict) -> tuple:
+    """Total bytes read from and written to block devices since the container started.
+
+    :param stats: a single decoded docker stats sample
+    :return: a tuple (bytes read, bytes written)
+    """
+    read_bytes = 0
+    write_bytes = 0
+    entries = stats.get("blkio_stats", {}).get("io_service_bytes_recursive") or []
+    for entry in entries:
+        op = entry.get("op", "").lower()
+        if op == "read":
+            read_bytes += entry.get("value", 0)
+        elif op == "write":
+            write_bytes += entry.get("value", 0)
+
+    return (read_bytes, write_bytes)
+
+
+def calculate_network_io(stats:dict) -> tuple:
+    """Total bytes received and sent across all container network interfaces.
+
+    :param stats: a single decoded docker stats sample
+    :return: a tuple (bytes received, bytes sent)
+    """
+    networks = stats.get("networks") or {}
+    rx_bytes = sum(interface.get("rx_bytes", 0) for interface in networks.values())
+    tx_bytes = sum(interface.get("tx_bytes", 0) for interface in networks.values())
+
+    return (rx_bytes, tx_bytes)
+
+
+class ResourceSampler:
+    """A class to sample container resource usage from the docker stats stream. Rollups can be read from or saved to a JSON file
+
+    Some logic for handy reference:
+    - Raw samples are kept in a bounded ring buffer in memory only
+    - Every sample is also added to a 1-minute and a 1-hour rollup bucket, which are saved to disk
+    - Block and network I/O are cumulative counters in docker, so rates are calculated between consecutive samples
+    - Each sample records the number of online players so we can work out resource cost per player
+
+    """
+
+    def __init__(self, filepath:str="", max_samples:int=600, max_minute_rollups:int=1440, max_hour_rollups:int=720):
+        """If a filepath is provided, read from rollup file automatically.
+
+        :param filepath: file to read from
+        :param max_samples: size of the raw sample ring buffer
+        :param max_minute_rollups: number of 1-minute rollups to keep, defaults to 1 day
+        :param max_hour_rollups: number of 1-hour rollups to keep, defaults to 30 days
+        """
+        self.samples = deque(maxlen=max_samples)
+        self.max_minute_rollups = max_minute_rollups
+        self.max_hour_rollups = max_hour_rollups
+        self.previous_counters = None
+
+        if filepath != "":
+            self.read_from_file(filepath)
+        else:
+            self.read_from_file()
+
+
+    def read_from_file(self, filepath:str="resource_stats.json") -> None:
+        """Read previous rollups from file. Uses defaults if file doesn't exist.
+
+        A file that can't be read or was written with a different schema is ignored with a warning, otherwise
+        every later run would fail on it until it was deleted by hand.
+
+        :param filepath: file to read from, defaults to "resource_stats.json"
+        """
+        self.version = SCHEMA_VERSION
+        self.minute_rollups = {}
+        self.hour_rollups = {}
+
+        if not os.path.exists(filepath):
+            return
+
+        try:
+            with open(filepath, 'r') as open_file:
+                file = json.load(open_file)
+            if file['version'] != SCHEMA_VERSION or file['fields'] != ROLLUP_FIELDS:
+                logger.warning(f"Ignoring {filepath} as it was saved with a different schema, starting with empty rollups")
+                return
+            minute_rollups = {int(bucket): values for bucket, values in file['minute_rollups'].items()}
+            hour_rollups = {int(bucket): values for bucket, values in file['hour_rollups'].items()}
+        except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring {filepath} as it couldn't be read, starting with empty rollups: {e}")
+            return
+
+        self.minute_rollups = minute_rollups
+        self.hour_rollups = hour_rollups
+
+
+    def save_to_file(self, filepath:str="resource_stats.json") -> None:
+        """Saves the rollups to a file. Written without whitespace as there can be a few thousand buckets.
+
+        :param filepath: file to save to, defaults to "resource_stats.json"
+        """
+        resource_stats = {
+            "version": self.version,
+            "fields": ROLLUP_FIELDS,
+            "minute_rollups": self.minute_rollups,
+            "hour_rollups": self.hour_rollups,
+        }
+
+        with open(filepath, 'w') as output:
+            json.dump(resource_stats, output, separators=(',', ':'))
+            logger.info(f"Saved resource stats to {filepath}")
+
+
+    def add_stats(self, stats:dict, player_count:int):
+        """Turn a single docker stats sample into a resource sample and add it to the ring buffer and rollups.
+
+        The first sample only seeds the I/O counters, and any sample where CPU or I/O rates can't be calculated
+        is skipped rather than recorded as zero usage, which would drag the averages down.
+
+        :param stats: a single decoded docker stats sample
+        :param player_count: number of players online when the sample was taken
+        :return: the resource sample that was recorded, None if it was skipped
+        """
+        if not is_running_sample(stats):
+            return None
+
+        timestamp = parse_docker_timestamp(stats["read"])
+        memory_bytes, memory_limit_bytes = calculate_memory_usage(stats)
+        block_read, block_write = calculate_block_io(stats)
+        network_rx, network_tx = calculate_network_io(stats)
+        cpu_percent = calculate_cpu_percent(stats)
+
+        counters = (timestamp, block_read, block_write, network_rx, network_tx)
+        if self.previous_counters is None:
+            self.previous_counters = counters
+            return None
+
+        elapsed = timestamp - self.previous_counters[0]
+        deltas = [current - previous for current, previous in zip(counters[1:], self.previous_counters[1:])]
+        if elapsed <= 0:
+            # duplicate or out of order sample, keep the earlier reading
+            return None
+        self.previous_counters = counters
+        if min(deltas) < 0 or cpu_percent is None:
+            # counters were reset by a container restart, start again from this reading
+            return None
+
+        rates = [delta / elapsed for delta in deltas]
+        sample = {
+            "timestamp": timestamp,
+            "cpu_percent": cpu_percent,
+            "memory_bytes": memory_bytes,
+            "memory_limit_bytes": memory_limit_bytes,
+            "block_read_rate": rates[0],
+            "block_write_rate": rates[1],
+            "network_rx_rate": rates[2],
+            "network_tx_rate": rates[3],
+            "player_count": player_count,
+        }
+
+        self.samples.append(sample)
+        self._add_to_rollup(self.minute_rollups, sample, 60, self.max_minute_rollups)
+        self._add_to_rollup(self.hour_rollups, sample, 3600, self.max_hour_rollups)
+
+        return sample
+
+
+    def consume_stream(self, stream, player_count:int, max_samples:int=5, max_reads:int=15) -> int:
+        """Read samples from a decoded docker stats stream, e.g. `container.stats(stream=True, decode=True)`.
+
+        Any iterable of stats dicts works, so a recorded stream can be replayed. Skipped samples don't count
+        towards max_samples, but max_reads stops us waiting forever on a stream that only has skipped samples.
+
+        :param stream: iterable of decoded docker stats samples
+        :param player_count: number of players online while sampling
+        :param max_samples: stop after this many samples are recorded, docker emits roughly one per second
+        :param max_reads: stop after reading this many samples from the stream
+        :return: number of samples recorded
+        """
+        recorded = 0
+        for stats in islice(stream, max_reads):
+            if self.add_stats(stats, player_count) is not None:
+                recorded += 1
+            if recorded >= max_samples:
+                break
+
+        logger.info(f"Recorded {recorded} resource samples with {player_count} players online")
+
+        return recorded
+
+
+    def _add_to_rollup(self, rollups:dict, sample:dict, bucket_seconds:int, max_buckets:int) -> None:
+        """Merge a sample into its rollup bucket, dropping the oldest buckets if there are too many.
+
+        :param rollups: the minute or hour rollups to update
+        :param sample: a resource sample from add_stats
+        :param bucket_seconds: width of each bucket in seconds
+        :param max_buckets: number of buckets to keep
+        """
+        bucket = int(sample["timestamp"] // bucket_seconds * bucket_seconds)
+        values = rollups.setdefault(bucket, [0] * len(ROLLUP_FIELDS))
+
+        values[0] += 1
+        values[1] += sample["cpu_percent"]
+        values[2] = max(values[2], sample["cpu_percent"])
+        values[3] += sample["memory_bytes"]
+        values[4] = max(values[4], sample["memory_bytes"])
+        values[5] = sample["memory_limit_bytes"]
+        values[6] += sample["block_read_rate"]
+        values[7] += sample["block_write_rate"]
+        values[8] += sample["network_rx_rate"]
+        values[9] += sample["network_tx_rate"]
+        values[10] += sample["player_count"]
+
+        for old_bucket in sorted(rollups)[:-max_buckets]:
+            del rollups[old_bucket]
+
+
+    def get_rollup_summary(self, rollup:list) -> dict:
+        """Convert a stored rollup bucket into averages, including the resource cost per online player.
+
+        Per player costs are None when nobody was online, as there is nothing to divide by.
+
+        :param rollup: a list of values in ROLLUP_FIELDS order
+        :return: a dictionary of averages and maximums
+        """
+        values = dict(zip(ROLLUP_FIELDS, rollup))
+        count = values["count"] if values["count"] > 0 else 1
+        average_players = values["player_count_sum"] / count
+
+        summary = {
+            "count": values["count"],
+            "cpu_percent": values["cpu_percent_sum"] / count,
+            "cpu_percent_max": values["cpu_percent_max"],
+            "memory_bytes": values["memory_bytes_sum"] / count,
+            "memory_bytes_max": values["memory_bytes_max"],
+            "memory_limit_bytes": values["memory_limit_bytes"],
+            "memory_percent": values["memory_bytes_sum"] / count / values["memory_limit_bytes"] * 100 if values["memory_limit_bytes"] > 0 else 0.0,
+            "block_read_rate": values["block_read_rate_sum"] / count,
+            "block_write_rate": values["block_write_rate_sum"] / count,
+            "network_rx_rate": values["network_rx_rate_sum"] / count,
+            "network_tx_rate": values["network_tx_rate_sum"] / count,
+            "player_count": average_players,
+            "cpu_percent_per_player": None,
+            "memory_bytes_per_player": None,
+        }
+        if average_players > 0:
+            summary["cpu_percent_per_player"] = summary["cpu_percent"] / average_players
+            summary["memory_bytes_per_player"] = summary["memory_bytes"] / average_players
+
+        return summary
+
+
+    # boilerplate (sigh)
+    def get_samples(self) -> list:
+        return list(self.samples)
+
+    def get_minute_rollups(self) -> dict:
+        return self.minute_rollups
+
+    def get_hour_rollups(self) -> dict:
+        return self.hour_rollups
+
+    def get_version(self) -> int:
+        return self.version
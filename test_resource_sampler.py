@@ -0,0 +1,148 @@
+import os
+import json
+import pytest
+from resource_sampler import ResourceSampler
+from resource_sampler import parse_docker_timestamp
+
+"""
+Replays recorded docker stats streams through the sampler. Both recordings hold steady usage, so every
+recorded sample should have the same CPU %, memory and I/O rates.
+
+- cgroup v2: 4 cpus at 200%, 5GB memory after 1GB inactive_file, read 4096 B/s, write 8192 B/s, rx 100 B/s, tx 300 B/s
+- cgroup v1: 2 cpus at 100%, 3.5GB memory after 500MB total_inactive_file, read 2048 B/s, write 1024 B/s, rx 50 B/s, tx 150 B/s
+  The v1 recording starts with two samples from while the container was still restarting.
+"""
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_data")
+MEMORY_LIMIT = 12884901888
+MINUTE_ONE = int(parse_docker_timestamp("2026-10-19T10:00:00Z"))
+MINUTE_TWO = int(parse_docker_timestamp("2026-10-19T10:01:00Z"))
+
+
+def load_recording(name:str) -> list:
+    with open(os.path.join(TEST_DATA, name), 'r') as open_file:
+        return json.load(open_file)
+
+
+def test_first_sample_only_seeds_counters(tmp_path):
+    sampler = ResourceSampler(str(tmp_path / "resource_stats.json"))
+    recording = load_recording("docker_stats_cgroup_v2.json")
+
+    # 6 samples in the recording, the first has empty precpu_stats and doesn't count towards max_samples
+    assert sampler.consume_stream(iter(recording), player_count=2, max_samples=5) == 5
+
+    samples = sampler.get_samples()
+    assert len(samples) == 5
+    assert samples[0]["timestamp"] == pytest.approx(parse_docker_timestamp(recording[1]["read"]))
+
+
+def test_cgroup_v2_recording(tmp_path):
+    sampler = ResourceSampler(str(tmp_path / "resource_stats.json"))
+    sampler.consume_stream(load_recording("docker_stats_cgroup_v2.json"), player_count=2)
+
+    for sample in sampler.get_samples():
+        assert sample["cpu_percent"] == pytest.approx(200.0)
+        assert sample["memory_bytes"] == 5000000000
+        assert sample["memory_limit_bytes"] == MEMORY_LIMIT
+        assert sample["block_read_rate"] == pytest.approx(4096.0)
+        assert sample["block_write_rate"] == pytest.approx(8192.0)
+        assert sample["network_rx_rate"] == pytest.approx(100.0)
+        assert sample["network_tx_rate"] == pytest.approx(300.0)
+
+    summary = sampler.get_rollup_summary(sampler.get_minute_rollups()[MINUTE_ONE])
+    assert summary["count"] == 5
+    assert summary["cpu_percent"] == pytest.approx(200.0)
+    assert summary["network_rx_rate"] == pytest.approx(100.0)
+
+
+def test_cgroup_v1_recording_skips_stopped_samples(tmp_path):
+    sampler = ResourceSampler(str(tmp_path / "resource_stats.json"))
+
+    assert sampler.consume_stream(load_recording("docker_stats_cgroup_v1.json"), player_count=3) == 5
+    assert list(sampler.get_minute_rollups().keys()) == [MINUTE_TWO]
+
+    for sample in sampler.get_samples():
+        assert sample["cpu_percent"] == pytest.approx(100.0)
+        assert sample["memory_bytes"] == 3500000000
+        # Sync, Async and Total entries must not be counted twice
+        assert sample["block_read_rate"] == pytest.approx(2048.0)
+        assert sample["block_write_rate"] == pytest.approx(1024.0)
+        assert sample["network_rx_rate"] == pytest.approx(50.0)
+        assert sample["network_tx_rate"] == pytest.approx(150.0)
+
+
+def test_max_reads_stops_on_stopped_container(tmp_path):
+    sampler = ResourceSampler(str(tmp_path / "resource_stats.json"))
+    stopped = load_recording("docker_stats_cgroup_v1.json")[0]
+
+    assert sampler.consume_stream(iter([stopped] * 100), player_count=0, max_reads=15) == 0
+    assert sampler.get_minute_rollups() == {}
+
+
+def test_rollups_merge_across_runs(tmp_path):
+    filepath = str(tmp_path / "resource_stats.json")
+
+    first_run = ResourceSampler(filepath)
+    first_run.consume_stream(load_recording("docker_stats_cgroup_v2.json"), player_count=2)
+    first_run.save_to_file(filepath)
+
+    second_run = ResourceSampler(filepath)
+    second_run.consume_stream(load_recording("docker_stats_cgroup_v1.json"), player_count=3)
+    second_run.save_to_file(filepath)
+
+    reloaded = ResourceSampler(filepath)
+    assert sorted(reloaded.get_minute_rollups().keys()) == [MINUTE_ONE, MINUTE_TWO]
+    assert list(reloaded.get_hour_rollups().keys()) == [MINUTE_ONE]
+
+    hour = reloaded.get_rollup_summary(reloaded.get_hour_rollups()[MINUTE_ONE])
+    assert hour["count"] == 10
+    assert hour["cpu_percent"] == pytest.approx(150.0)
+    assert hour["cpu_percent_max"] == pytest.approx(200.0)
+    assert hour["memory_bytes"] == pytest.approx(4250000000)
+    assert hour["memory_bytes_max"] == 5000000000
+    assert hour["block_read_rate"] == pytest.approx(3072.0)
+    assert hour["network_tx_rate"] == pytest.approx(225.0)
+    assert hour["player_count"] == pytest.approx(2.5)
+
+
+def test_rollups_are_pruned(tmp_path):
+    filepath = str(tmp_path / "resource_stats.json")
+
+    first_run = ResourceSampler(filepath, max_samples=3, max_minute_rollups=1, max_hour_rollups=1)
+    first_run.consume_stream(load_recording("docker_stats_cgroup_v2.json"), player_count=2)
+    first_run.save_to_file(filepath)
+    assert len(first_run.get_samples()) == 3
+
+    second_run = ResourceSampler(filepath, max_samples=3, max_minute_rollups=1, max_hour_rollups=1)
+    second_run.consume_stream(load_recording("docker_stats_cgroup_v1.json"), player_count=3)
+
+    assert list(second_run.get_minute_rollups().keys()) == [MINUTE_TWO]
+    assert list(second_run.get_hour_rollups().keys()) == [MINUTE_ONE]
+    assert second_run.get_hour_rollups()[MINUTE_ONE][0] == 10
+
+
+def test_summary_per_player(tmp_path):
+    sampler = ResourceSampler(str(tmp_path / "resource_stats.json"))
+    sampler.consume_stream(load_recording("docker_stats_cgroup_v2.json"), player_count=2)
+
+    summary = sampler.get_rollup_summary(sampler.get_minute_rollups()[MINUTE_ONE])
+    assert summary["memory_percent"] == pytest.approx(5000000000 / MEMORY_LIMIT * 100)
+    assert summary["cpu_percent_per_player"] == pytest.approx(100.0)
+    assert summary["memory_bytes_per_player"] == pytest.approx(2500000000)
+
+    empty_server = ResourceSampler(str(tmp_path / "empty_server.json"))
+    empty_server.consume_stream(load_recording("docker_stats_cgroup_v2.json"), player_count=0)
+
+    summary = empty_server.get_rollup_summary(empty_server.get_minute_rollups()[MINUTE_ONE])
+    assert summary["cpu_percent_per_player"] is None
+    assert summary["memory_bytes_per_player"] is None
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    truncated = tmp_path / "truncated.json"
+    truncated.write_text('{"version":1,"fields":["count"')
+    assert ResourceSampler(str(truncated)).get_minute_rollups() == {}
+
+    old_schema = tmp_path / "old_schema.json"
+    old_schema.write_text(json.dumps({"version": 1, "fields": ["count"], "minute_rollups": {"0": [1]}, "hour_rollups": {}}))
+    assert ResourceSampler(str(old_schema)).get_minute_rollups() == {}